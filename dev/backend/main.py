@@ -1,6 +1,5 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Response, Form, status
-from fastapi.responses import StreamingResponse, RedirectResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Depends, HTTPException, Response, Form
+from fastapi.responses import StreamingResponse, RedirectResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -8,6 +7,7 @@ import json
 import os
 import asyncio
 import secrets
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 # App imports
@@ -26,8 +26,31 @@ load_dotenv(env_path, override=True)
 from dev.backend.utils.scraper import UltimateScraper
 from dev.backend.utils.serp import search_google
 from dev.backend.utils.llm import analyze_content, generate_meta_tags
-
-app = FastAPI()
+from dev.backend.utils.auth import AuthMiddleware
+from dev.backend.utils.static_assets import FrontendFiles, ASSETS_PREFIX
+from dev.backend.utils.profiling import SamplingProfiler, ProfileStore, LoopLagMonitor
+
+# --- Profiling ---
+# Sampling profiler for single /api/process runs. Off by default: it samples
+# every thread in the process, so only the admin should turn it on.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+# Log event loop stalls longer than this (0 disables the monitor)
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+
+profile_store = ProfileStore()
+# One profiled run at a time, samples from overlapping runs would mix
+profiler_lock = asyncio.Lock()
+loop_lag_monitor = LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD_MS / 1000) if LOOP_LAG_THRESHOLD_MS > 0 else None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if loop_lag_monitor:
+        loop_lag_monitor.start()
+    yield
+    if loop_lag_monitor:
+        loop_lag_monitor.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # --- Auth Configuration ---
 APP_USERNAME = os.getenv("APP_USERNAME", "admin")
@@ -37,35 +60,17 @@ SESSION_COOKIE_NAME = "metagen_session"
 SESSION_SECRET_VALUE = os.getenv("SESSION_SECRET", secrets.token_hex(16))
 
 # --- Middleware for Auth Protection ---
-@app.middleware("http")
-async def auth_middleware(request: Request, call_next):
-    # Public paths
-    if request.url.path in ["/login", "/api/login", "/favicon.ico"]:
-         return await call_next(request)
-    
-    auth_cookie = request.cookies.get(SESSION_COOKIE_NAME)
-    
-    # Verify authentication
-    is_authenticated = False
-    if auth_cookie and secrets.compare_digest(auth_cookie, SESSION_SECRET_VALUE):
-        is_authenticated = True
-        
-    if not is_authenticated:
-        # If API request, return 401
-        if request.url.path.startswith("/api"):
-            return Response(status_code=status.HTTP_401_UNAUTHORIZED, content="Unauthorized")
-        
-        # If Page request (root or others), Redirect to Login
-        return RedirectResponse("/login")
-        
-    response = await call_next(request)
-    return response
+# Public paths; hashed frontend assets (CSS/JS) carry no user data
+app.add_middleware(
+    AuthMiddleware,
+    cookie_name=SESSION_COOKIE_NAME,
+    secret_value=SESSION_SECRET_VALUE,
+    public_paths=["/login", "/api/login", "/favicon.ico"],
+    public_prefixes=[ASSETS_PREFIX],
+)
 
 # --- Auth Endpoints ---
-@app.get("/login")
-async def login_page():
-    frontend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../frontend"))
-    return FileResponse(os.path.join(frontend_dir, "login.html"))
+# GET /login (login.html) is served from memory by FrontendFiles, see bottom
 
 @app.post("/api/login")
 async def login(username: str = Form(...), password: str = Form(...)):
@@ -101,6 +106,7 @@ from datetime import datetime
 class ProcessRequest(BaseModel):
     type: str  # 'url' or 'text'
     content: str
+    profile: bool = False  # Admin only, requires PROFILER_ENABLED
 
 class HistoryItemCreate(BaseModel):
     title: str
@@ -133,6 +139,34 @@ if not ANTHROPIC_OPENROUTER_API_KEY:
     # Fallback to ANTHROPIC_API_KEY if strictly using that, or notify user
     ANTHROPIC_OPENROUTER_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
+async def profiled_stream(stream, name):
+    if profiler_lock.locked():
+        yield json.dumps({"status": "info", "message": "Profiler ocupado con otra ejecución, se continúa sin perfilar."}) + "\n"
+        async for chunk in stream:
+            yield chunk
+        return
+
+    async with profiler_lock:
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            # stop() joins the sampler thread, keep that off the event loop
+            await asyncio.to_thread(profiler.stop)
+        if not profiler.has_samples():
+            # Too short, or every thread idle: nothing speedscope could open
+            yield json.dumps({"status": "info", "message": f"Perfil sin muestras ({profiler.duration:.3f}s), no se guarda."}) + "\n"
+            return
+        profile_id = await asyncio.to_thread(profile_store.add, name, profiler)
+
+    yield json.dumps({
+        "status": "info",
+        "message": f"Perfil disponible ({profiler.duration:.1f}s).",
+        "data": {"profile_id": profile_id, "download_url": f"/api/profiles/{profile_id}"}
+    }) + "\n"
+
 # --- Helper to get prompts safely ---
 def get_or_create_prompts(db: Session):
     config = db.query(models.DBPromptsConfig).filter(models.DBPromptsConfig.id == 1).first()
@@ -172,6 +206,9 @@ def get_or_create_prompts(db: Session):
 
 @app.post("/api/process")
 async def process_data(request: ProcessRequest, db: Session = Depends(get_db)):
+    if request.profile and not PROFILER_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiler desactivado (PROFILER_ENABLED)")
+
     # 1. Fetch prompts *before* starting the async generator
     # to avoid thread-local DB issues inside the generator if not careful.
     prompts_config = get_or_create_prompts(db)
@@ -282,7 +319,31 @@ async def process_data(request: ProcessRequest, db: Session = Depends(get_db)):
         except Exception as e:
             yield json.dumps({"status": "error", "message": f"Error crítico inesperado: {str(e)}"}) + "\n"
 
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+    stream = event_generator()
+    if request.profile:
+        stream = profiled_stream(stream, f"{request.type}: {request.content[:80]}")
+
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+# --- PROFILES API ---
+
+@app.get("/api/profiles")
+def list_profiles():
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler desactivado")
+    return profile_store.list()
+
+@app.get("/api/profiles/{profile_id}")
+def download_profile(profile_id: str):
+    item = profile_store.get(profile_id) if PROFILER_ENABLED else None
+    if not item:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    # Open with https://www.speedscope.app
+    return Response(
+        content=item["content"],
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="metagen-{profile_id}.speedscope.json"'}
+    )
 
 # --- HISTORY API ---
 
@@ -355,6 +416,6 @@ async def save_prompts_endpoint(prompts: PromptsSchema, db: Session = Depends(ge
 # Serve frontend
 frontend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../frontend"))
 if os.path.exists(frontend_path):
-    app.mount("/", StaticFiles(directory=frontend_path, html=True), name="frontend")
+    app.mount("/", FrontendFiles(frontend_path, aliases={"/login": "login.html"}), name="frontend")
 else:
     print(f"Warning: Frontend path {frontend_path} does not exist.")
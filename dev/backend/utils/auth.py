@@ -0,0 +1,42 @@
+import secrets
+from starlette.requests import cookie_parser
+from starlette.responses import Response, RedirectResponse
+
+class AuthMiddleware:
+    # Pure ASGI middleware: no BaseHTTPMiddleware task group / body re-streaming,
+    # so static files and streamed NDJSON responses pass straight through.
+    def __init__(self, app, cookie_name, secret_value, public_paths=(), public_prefixes=()):
+        self.app = app
+        self.cookie_name = cookie_name
+        self.secret_value = secret_value.encode("utf-8")
+        self.public_paths = frozenset(public_paths)
+        self.public_prefixes = tuple(public_prefixes)
+
+    def _is_public(self, path):
+        return path in self.public_paths or (bool(self.public_prefixes) and path.startswith(self.public_prefixes))
+
+    def _is_authenticated(self, scope):
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                cookie = cookie_parser(value.decode("latin-1")).get(self.cookie_name)
+                if cookie and secrets.compare_digest(cookie.encode("utf-8"), self.secret_value):
+                    return True
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if self._is_public(path) or self._is_authenticated(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # If API request, return 401
+        if path.startswith("/api"):
+            response = Response(status_code=401, content="Unauthorized")
+        else:
+            # If Page request (root or others), Redirect to Login
+            response = RedirectResponse("/login")
+        await response(scope, receive, send)
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+logger = logging.getLogger("metagen.profiling")
+
+# Innermost frames that mean "this thread is idle", not doing work:
+# thread pool workers waiting for a job
+WAIT_MODULES = ("threading.py", "queue.py")
+IDLE_FRAMES = {
+    ("_worker", "thread.py"),
+    ("run", "_asyncio.py"),
+}
+# The app's event loop waiting in select() is idle too. Only for that thread:
+# loops run inside workers (Playwright's sync API) are real waits of the run.
+LOOP_IDLE_FRAMES = {
+    ("select", "selectors.py"),
+    ("poll", "selectors.py"),
+}
+
+# Our own helper threads (profiler, lag watchdog) are never sampled
+OWN_THREAD_PREFIX = "metagen-"
+
+MAX_STACK_DEPTH = 256
+
+
+class SamplingProfiler:
+    # Low-overhead sampler: a daemon thread reads sys._current_frames() every
+    # `interval` seconds, so it sees the event loop thread and the
+    # asyncio.to_thread workers alike. Nothing is traced between samples.
+    # Samples from every thread in the process are recorded, so runs that
+    # overlap with other requests will show their work too.
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._frames = []
+        self._frame_index = {}
+        # thread id -> list of [stack, weight]; consecutive identical stacks
+        # are merged into one sample with the summed weight
+        self._samples = defaultdict(list)
+        self._loop_thread_id = None
+        self._thread_names = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.duration = 0.0
+        self.ticks = 0
+
+    def start(self):
+        # Called from the event loop thread
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self._run, name="metagen-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _frame_id(self, code):
+        key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = len(self._frames)
+            self._frame_index[key] = index
+            self._frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _is_idle(self, thread_id, frame):
+        code = frame.f_code
+        if thread_id == self._loop_thread_id and (code.co_name, os.path.basename(code.co_filename)) in LOOP_IDLE_FRAMES:
+            return True
+        # Step over the blocking machinery (Condition.wait, Queue.get) first
+        while frame is not None and os.path.basename(frame.f_code.co_filename) in WAIT_MODULES:
+            frame = frame.f_back
+        return frame is not None and (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES
+
+    def _stack(self, thread_id, frame):
+        if self._is_idle(thread_id, frame):
+            return None
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._frame_id(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _sample(self, weight):
+        self.ticks += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id not in self._thread_names:
+                self._thread_names.update((t.ident, t.name) for t in threading.enumerate())
+                # Threads enumerate() never reports (started from C) stay
+                # unnamed instead of triggering a refresh on every tick
+                self._thread_names.setdefault(thread_id, "thread")
+            if self._thread_names[thread_id].startswith(OWN_THREAD_PREFIX):
+                continue
+            stack = self._stack(thread_id, frame)
+            if stack is None:
+                continue
+            samples = self._samples[thread_id]
+            if samples and samples[-1][0] == stack:
+                samples[-1][1] += weight
+            else:
+                samples.append([stack, weight])
+
+    def _run(self):
+        start = last = time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+        self.duration = time.perf_counter() - start
+
+    def has_samples(self):
+        return any(self._samples.values())
+
+    def to_speedscope(self, name):
+        # https://www.speedscope.app/file-format-schema.json, one "sampled"
+        # profile per thread, weights in seconds
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            total = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self._thread_names.get(thread_id, 'thread')} ({thread_id})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        # Busiest thread first, that's what speedscope opens
+        profiles.sort(key=lambda p: p["endValue"], reverse=True)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "metagen",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    # Keeps the last few finished profiles in memory for download
+    def __init__(self, max_items=10):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, name, profiler):
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._items[profile_id] = {
+                "id": profile_id,
+                "name": name,
+                "created_at": profiler.started_at,
+                "duration": profiler.duration,
+                "content": json.dumps(profiler.to_speedscope(name)),
+            }
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._items.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            items = list(self._items.values())
+        return [
+            {"id": i["id"], "name": i["name"], "created_at": i["created_at"], "duration": i["duration"]}
+            for i in reversed(items)
+        ]
+
+
+class LoopLagMonitor:
+    # A heartbeat task on the event loop stamps the time every `interval`;
+    # a watchdog thread notices when the stamp goes stale for longer than
+    # `threshold` and logs the loop thread's stack *while it is still blocked*,
+    # plus the task that was running. When the loop recovers, the total stall
+    # is logged too.
+
+    def __init__(self, threshold=0.25, interval=0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat = 0.0
+        self._task = None
+        self._watchdog = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = self._loop.create_task(self._beat(), name="metagen-loop-lag-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="metagen-loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _beat(self):
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _blocking_task(self):
+        # Read-only peek at asyncio's bookkeeping from another thread
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is None:
+            return "(ninguna tarea; callback o código síncrono del loop)"
+        coro = task.get_coro()
+        return f"{task.get_name()} -> {getattr(coro, '__qualname__', coro)}"
+
+    def _watch(self):
+        stalled_since = None
+        while not self._stop_event.wait(self.interval):
+            lag = time.monotonic() - self._heartbeat - self.interval
+            if lag > self.threshold:
+                if stalled_since is None:
+                    stalled_since = self._heartbeat
+                    frame = sys._current_frames().get(self._loop_thread_id)
+                    stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+                    logger.warning(
+                        "Event loop bloqueado %.0f ms (umbral %.0f ms). Tarea: %s\n%s",
+                        lag * 1000, self.threshold * 1000, self._blocking_task(), stack,
+                    )
+            elif stalled_since is not None:
+                logger.warning(
+                    "Event loop recuperado tras ~%.0f ms bloqueado",
+                    (self._heartbeat - stalled_since - self.interval) * 1000,
+                )
+                stalled_since = None
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+import brotli
+
+# Content-hashed copies of CSS/JS are served from here with immutable caching
+ASSETS_PREFIX = "/assets/"
+HASHED_EXTENSIONS = (".css", ".js")
+
+CACHE_IMMUTABLE = b"public, max-age=31536000, immutable"
+# Unhashed files (HTML, original CSS/JS names) must be revalidated via ETag
+CACHE_REVALIDATE = b"no-cache"
+
+# Browser preference order when several encodings are acceptable
+ENCODINGS = ("br", "gzip")
+
+ASSET_REF_RE = re.compile(r'(\b(?:href|src)=)(["\'])([^"\']+)\2')
+
+
+def parse_accept_encoding(header):
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        params = params.replace(" ", "")
+        if not coding or params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(ENCODINGS)
+    return accepted
+
+
+class StaticAsset:
+    def __init__(self, body, media_type, cache_control):
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        content_type = media_type.encode("latin-1")
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            content_type += b"; charset=utf-8"
+
+        # encoding -> (body, response headers); identity is always available
+        self.variants = {}
+        candidates = [
+            ("identity", body),
+            ("gzip", gzip.compress(body, compresslevel=9, mtime=0)),
+            ("br", brotli.compress(body, quality=11)),
+        ]
+
+        for encoding, data in candidates:
+            if encoding != "identity" and len(data) >= len(body):
+                continue
+            etag = f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            headers = [
+                (b"content-type", content_type),
+                (b"cache-control", cache_control),
+                (b"etag", etag.encode("latin-1")),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            if encoding != "identity":
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+            self.variants[encoding] = (data, etag, headers)
+
+    def select(self, accept_encoding):
+        if accept_encoding and len(self.variants) > 1:
+            accepted = parse_accept_encoding(accept_encoding)
+            for encoding in ENCODINGS:
+                if encoding in accepted and encoding in self.variants:
+                    return self.variants[encoding]
+        return self.variants["identity"]
+
+
+class FrontendFiles:
+    # Replacement for StaticFiles(html=True) over a small frontend directory.
+    # Everything is read, hashed and compressed once at startup, so serving a
+    # file is a dict lookup with no disk I/O or thread pool hop.
+    # Restart the server after editing the frontend.
+
+    def __init__(self, directory, aliases=None):
+        self.directory = directory
+        self.routes = {}
+        # "style.css" -> "/assets/style.<hash>.css"
+        self.asset_urls = {}
+
+        files = {}
+        for root, _dirs, names in os.walk(directory):
+            for name in names:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    files[rel_path] = f.read()
+
+        for rel_path, body in files.items():
+            stem, ext = os.path.splitext(rel_path)
+            if ext in HASHED_EXTENSIONS:
+                digest = hashlib.sha256(body).hexdigest()[:10]
+                hashed_url = f"{ASSETS_PREFIX}{stem}.{digest}{ext}"
+                self.asset_urls[rel_path] = hashed_url
+                self.routes[hashed_url] = StaticAsset(body, self._media_type(rel_path), CACHE_IMMUTABLE)
+
+        for rel_path, body in files.items():
+            if rel_path.endswith(".html"):
+                body = self._rewrite_asset_refs(body)
+            asset = StaticAsset(body, self._media_type(rel_path), CACHE_REVALIDATE)
+            self.routes["/" + rel_path] = asset
+            if rel_path == "index.html" or rel_path.endswith("/index.html"):
+                self.routes["/" + rel_path[:-len("index.html")]] = asset
+
+        # Extra URLs for existing files, e.g. {"/login": "login.html"}
+        for path, rel_path in (aliases or {}).items():
+            self.routes[path] = self.routes["/" + rel_path]
+
+    def _media_type(self, path):
+        media_type, _ = mimetypes.guess_type(path)
+        return media_type or "application/octet-stream"
+
+    def _rewrite_asset_refs(self, body):
+        def replace(match):
+            url = match.group(3)
+            hashed_url = self.asset_urls.get(url.removeprefix("./").lstrip("/"))
+            if hashed_url is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{hashed_url}{match.group(2)}"
+
+        return ASSET_REF_RE.sub(replace, body.decode("utf-8")).encode("utf-8")
+
+    async def __call__(self, scope, receive, send):
+        method = scope["method"]
+        asset = self.routes.get(scope["path"])
+
+        if method not in ("GET", "HEAD"):
+            await self._send_plain(send, 405, b"Method Not Allowed")
+            return
+        if asset is None:
+            await self._send_plain(send, 404, b"Not Found")
+            return
+
+        accept_encoding = b""
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+            elif name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        body, etag, headers = asset.select(accept_encoding.decode("latin-1"))
+
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            if etag in tags or "*" in tags:
+                await send({"type": "http.response.start", "status": 304, "headers": headers[1:]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        headers = headers + [(b"content-length", str(len(body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+
+    async def _send_plain(self, send, status, body):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
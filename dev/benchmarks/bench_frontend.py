@@ -0,0 +1,107 @@
+"""
+Micro-benchmark for the request path that serves the frontend.
+
+Drives the ASGI app in-process (no sockets, no HTTP client) so the numbers
+reflect middleware + static file handling only.
+
+Usage (desde la raíz del proyecto):
+    python -m dev.benchmarks.bench_frontend [--seconds 3]
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+
+# Keep the benchmark away from the real database file
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from dev.backend.main import app, SESSION_COOKIE_NAME, SESSION_SECRET_VALUE
+
+COOKIE = f"{SESSION_COOKIE_NAME}={SESSION_SECRET_VALUE}".encode()
+
+
+def build_scope(path, cookie=True, accept_encoding=b"gzip, deflate, br"):
+    headers = [
+        (b"host", b"localhost"),
+        (b"accept-encoding", accept_encoding),
+        (b"user-agent", b"bench"),
+    ]
+    if cookie:
+        headers.append((b"cookie", COOKIE))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 8000),
+    }
+
+
+async def request(path, cookie=True, accept_encoding=b"gzip, deflate, br"):
+    status = None
+    body = []
+
+    sent_request = False
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Client never disconnects; the server cancels this wait when done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(build_scope(path, cookie, accept_encoding), receive, send)
+    return status, b"".join(body)
+
+
+async def run_case(path, seconds, cookie=True):
+    # Warm up (file stat caches, lazy imports...)
+    for _ in range(50):
+        await request(path, cookie)
+
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        status, body = await request(path, cookie)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return status, len(body), count / elapsed
+
+
+async def main(seconds):
+    # Uncompressed copy of the page, just to discover asset URLs
+    _, index = await request("/", accept_encoding=b"identity")
+    assets = re.findall(rb'(?:href|src)="(/?[\w./-]+\.(?:css|js))"', index)
+    paths = ["/"] + ["/" + a.decode().lstrip("/") for a in assets]
+
+    print(f"{'path':40} {'auth':>5} {'status':>6} {'bytes':>7} {'req/s':>10}")
+    for path in paths:
+        status, size, rps = await run_case(path, seconds)
+        print(f"{path:40} {'yes':>5} {status:>6} {size:>7} {rps:>10.0f}")
+    for path in ["/", "/api/history"]:
+        status, size, rps = await run_case(path, seconds, cookie=False)
+        print(f"{path:40} {'no':>5} {status:>6} {size:>7} {rps:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds))
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+import pytest
+
+# Must be set before dev.backend.main (and its engine) is imported
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from dev.backend.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_client(client):
+    response = client.post("/api/login", data={"username": "admin", "password": "admin"})
+    assert response.status_code == 200
+    return client
@@ -0,0 +1,131 @@
+import gzip
+import os
+import re
+
+import brotli
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from dev.backend.utils.auth import AuthMiddleware
+from dev.backend.utils.static_assets import ASSETS_PREFIX, FrontendFiles, parse_accept_encoding
+
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "..", "dev", "frontend")
+HASHED_ASSET_RE = r"/assets/%s\.[0-9a-f]{10}\.%s"
+
+
+# --- AuthMiddleware ---
+
+@pytest.fixture
+def auth_app_client():
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[
+        Route("/", ok),
+        Route("/login", ok),
+        Route("/api/data", ok),
+        Route("/assets/style.abc.css", ok),
+    ])
+    app.add_middleware(
+        AuthMiddleware,
+        cookie_name="session",
+        secret_value="s3cret",
+        public_paths=["/login"],
+        public_prefixes=[ASSETS_PREFIX],
+    )
+    return TestClient(app)
+
+
+def test_missing_cookie_gets_401_on_api_and_redirect_on_pages(auth_app_client):
+    assert auth_app_client.get("/api/data").status_code == 401
+
+    response = auth_app_client.get("/", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "/login"
+
+
+def test_wrong_cookie_is_rejected(auth_app_client):
+    auth_app_client.cookies.set("session", "wrong")
+    assert auth_app_client.get("/api/data").status_code == 401
+    assert auth_app_client.get("/", follow_redirects=False).status_code == 307
+
+
+def test_valid_cookie_passes(auth_app_client):
+    auth_app_client.cookies.set("session", "s3cret")
+    assert auth_app_client.get("/api/data").text == "ok"
+    assert auth_app_client.get("/").text == "ok"
+
+
+def test_public_paths_and_prefixes_skip_auth(auth_app_client):
+    assert auth_app_client.get("/login").text == "ok"
+    assert auth_app_client.get("/assets/style.abc.css").text == "ok"
+
+
+# --- Frontend delivery through the app ---
+
+def test_assets_prefix_only_reaches_hashed_files(client):
+    assert client.get("/style.css", follow_redirects=False).status_code == 307
+    assert client.get("/login.html", follow_redirects=False).status_code == 307
+    assert client.get("/assets/x").status_code == 404
+    assert client.get("/assets/style.css").status_code == 404
+    assert client.get("/assets/login.html").status_code == 404
+
+
+def test_index_references_hashed_assets(auth_client):
+    index = auth_client.get("/").text
+    css = re.search(r'href="(%s)"' % HASHED_ASSET_RE % ("style", "css"), index)
+    js = re.search(r'src="(%s)"' % HASHED_ASSET_RE % ("script", "js"), index)
+    assert css and js
+    assert 'href="style.css"' not in index
+
+    # Hashed assets are public and cached forever
+    auth_client.cookies.clear()
+    response = auth_client.get(css.group(1))
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    with open(os.path.join(FRONTEND_DIR, "style.css"), "rb") as f:
+        assert response.content == f.read()
+
+
+def test_login_page_is_served_compressed_from_memory(client):
+    response = client.get("/login", headers={"accept-encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert "etag" in response.headers
+
+
+def test_if_none_match_gets_304(auth_client):
+    first = auth_client.get("/", headers={"accept-encoding": "gzip"})
+    etag = first.headers["etag"]
+
+    second = auth_client.get("/", headers={"accept-encoding": "gzip", "if-none-match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+
+    # Another representation has another ETag
+    other = auth_client.get("/", headers={"accept-encoding": "identity", "if-none-match": etag})
+    assert other.status_code == 200
+
+
+# --- FrontendFiles / Accept-Encoding ---
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0") == {"gzip"}
+    assert parse_accept_encoding("br;q=0.0, gzip; q=0.5") == {"gzip"}
+    assert {"br", "gzip"} <= parse_accept_encoding("*")
+    assert parse_accept_encoding("") == set()
+
+
+def test_encoding_negotiation():
+    files = FrontendFiles(FRONTEND_DIR)
+    asset = files.routes["/style.css"]
+    identity = asset.select("")[0]
+
+    assert asset.select("gzip, br")[0] == brotli.compress(identity, quality=11)
+    assert gzip.decompress(asset.select("gzip, br;q=0")[0]) == identity
+    assert asset.select("*")[0] == asset.select("br")[0]
+    assert asset.select("deflate")[0] == identity
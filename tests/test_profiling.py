@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from dev.backend.utils.profiling import LoopLagMonitor, ProfileStore, SamplingProfiler
+
+
+def profile_worker_loop(min_ticks=5):
+    # Same shape as Playwright's sync API: an event loop running inside an
+    # asyncio.to_thread worker, waiting in select() while the profiler ticks
+    async def wait_for_ticks(profiler):
+        while profiler.ticks < min_ticks:
+            await asyncio.sleep(0.01)
+
+    async def run():
+        profiler = SamplingProfiler()
+        profiler.start()
+        await asyncio.to_thread(lambda: asyncio.run(wait_for_ticks(profiler)))
+        await asyncio.to_thread(profiler.stop)
+        return profiler
+
+    return asyncio.run(run())
+
+
+def leaf_frames(profile, frames):
+    return {(frames[stack[-1]]["name"], frames[stack[-1]]["file"]) for stack in profile["samples"]}
+
+
+# --- SamplingProfiler ---
+
+def test_worker_thread_event_loop_wait_is_sampled():
+    profiler = profile_worker_loop()
+    speedscope = profiler.to_speedscope("test")
+    frames = speedscope["shared"]["frames"]
+
+    assert profiler.has_samples()
+    assert any(
+        name.endswith("select") and file.endswith("selectors.py")
+        for profile in speedscope["profiles"]
+        for name, file in leaf_frames(profile, frames)
+    )
+
+
+def test_consecutive_identical_stacks_are_merged():
+    parked = threading.Event()
+    release = threading.Event()
+
+    def park():
+        parked.set()
+        release.wait()
+
+    thread = threading.Thread(target=park, name="parked")
+    thread.start()
+    parked.wait()
+    try:
+        profiler = SamplingProfiler()
+        for _ in range(5):
+            profiler._sample(0.005)
+    finally:
+        release.set()
+        thread.join()
+
+    profile = next(p for p in profiler.to_speedscope("test")["profiles"] if p["name"].startswith("parked"))
+    assert profiler.ticks == 5
+    assert len(profile["samples"]) == 1
+    assert profile["weights"] == [pytest.approx(0.025)]
+
+
+def test_profile_without_samples():
+    profiler = SamplingProfiler()
+    assert not profiler.has_samples()
+    assert profiler.to_speedscope("test")["profiles"] == []
+
+
+# --- ProfileStore ---
+
+def test_profile_store_evicts_oldest():
+    store = ProfileStore(max_items=2)
+    first, second, third = (store.add(f"run {i}", SamplingProfiler()) for i in range(3))
+
+    assert store.get(first) is None
+    assert [item["id"] for item in store.list()] == [third, second]
+    assert json.loads(store.get(third)["content"])["name"] == "run 2"
+
+
+# --- LoopLagMonitor ---
+
+def test_loop_lag_monitor_logs_blocking_stack(caplog):
+    def blocking_helper():
+        time.sleep(0.3)
+
+    async def slow_handler():
+        blocking_helper()
+
+    async def run():
+        monitor = LoopLagMonitor(threshold=0.05, interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(slow_handler(), name="req-42")
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="metagen.profiling"):
+        asyncio.run(run())
+
+    stall = next(r.getMessage() for r in caplog.records if "bloqueado" in r.getMessage() and "req-42" in r.getMessage())
+    assert "slow_handler" in stall
+    assert "blocking_helper" in stall
+    assert any("recuperado" in r.getMessage() for r in caplog.records)
+
+
+# --- API ---
+
+def test_process_profile_rejected_when_profiler_disabled(auth_client, monkeypatch):
+    import dev.backend.main as main
+    monkeypatch.setattr(main, "PROFILER_ENABLED", False)
+
+    response = auth_client.post("/api/process", json={"type": "text", "content": "hola", "profile": True})
+    assert response.status_code == 403
+
+
+def test_download_profile(auth_client, monkeypatch):
+    import dev.backend.main as main
+    store = ProfileStore()
+    monkeypatch.setattr(main, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(main, "profile_store", store)
+    profile_id = store.add("text: hola", SamplingProfiler())
+
+    response = auth_client.get(f"/api/profiles/{profile_id}")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == f'attachment; filename="metagen-{profile_id}.speedscope.json"'
+    assert response.json()["name"] == "text: hola"
+
+    assert auth_client.get("/api/profiles/unknown").status_code == 404
+
+    monkeypatch.setattr(main, "PROFILER_ENABLED", False)
+    assert auth_client.get(f"/api/profiles/{profile_id}").status_code == 404
+
+
+def test_profiled_stream_skips_runs_without_samples(monkeypatch):
+    import dev.backend.main as main
+    store = ProfileStore()
+    monkeypatch.setattr(main, "profile_store", store)
+    # No tick can happen before the run ends
+    monkeypatch.setattr(main, "SamplingProfiler", lambda: SamplingProfiler(interval=60))
+
+    async def stream():
+        yield "chunk\n"
+
+    async def run():
+        return [chunk async for chunk in main.profiled_stream(stream(), "text: hola")]
+
+    chunks = asyncio.run(run())
+    assert chunks[0] == "chunk\n"
+    assert "sin muestras" in json.loads(chunks[-1])["message"]
+    assert store.list() == []